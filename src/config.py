@@ -24,6 +24,15 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 # 模型配置
 # =============================================================================
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-large-zh-v1.5")
+# Embedding運算裝置：auto（有CUDA則用GPU）、cpu、cuda
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "auto").lower()
+# 使用GPU時以半精度（FP16）執行embedding模型
+EMBEDDING_FP16 = os.getenv("EMBEDDING_FP16", "true").lower() == "true"
+# 使用CPU時將embedding模型動態量化為int8
+EMBEDDING_INT8 = os.getenv("EMBEDDING_INT8", "false").lower() == "true"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+# 依文本內容快取embedding向量，重複的文本塊不必重新編碼
+EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE", "false").lower() == "true"
 
 # =============================================================================
 # 路徑配置
@@ -41,11 +50,20 @@ RESULTS_PATH = os.getenv("RESULTS_PATH", str(BASE_DIR / "results"))
 # =============================================================================
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "800"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+# PDF解析器：pypdf（預設）、pymupdf（需安裝pymupdf，速度快數倍）
+PDF_LOADER = os.getenv("PDF_LOADER", "pypdf").lower()
+# 以embedding模型tokenizer計算的文本塊大小（0表示依字元數分割）
+TOKEN_CHUNK_SIZE = int(os.getenv("TOKEN_CHUNK_SIZE", "0"))
+TOKEN_CHUNK_OVERLAP = int(os.getenv("TOKEN_CHUNK_OVERLAP", "64"))
 
 # =============================================================================
 # 搜索和匹配參數
 # =============================================================================
 SEARCH_K = int(os.getenv("SEARCH_K", "10"))
+# FAISS索引類型：flat（精確搜索）、ivfpq（倒排+乘積量化，省記憶體）、
+# hnsw（圖索引，查詢快）、sqfp16（半精度儲存，記憶體減半）、sq8（8位元儲存，記憶體1/4）、
+# hnswsq8（hnsw+sq8）、auto（文本塊多時自動改用ivfpq）
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
 
 # =============================================================================
@@ -54,6 +72,7 @@ CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
 MAX_DOCS_PER_RUN = int(os.getenv("MAX_DOCS_PER_RUN", "300"))
 ENABLE_LLM_ENHANCEMENT = os.getenv("ENABLE_LLM_ENHANCEMENT", "true").lower() == "true"
 LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
 
 # =============================================================================
 # 自動創建必要目錄
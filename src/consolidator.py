@@ -66,35 +66,39 @@ class ESGDataConsolidator:
     
     def _scan_excel_files(self) -> List[Path]:
         """掃描所有Excel檔案，排除包含'無提取'的檔案"""
-        excel_files = []
+        excel_entries = []
         excluded_files = []
         
-        # 查找所有Excel檔案
-        patterns = [
-            "提取結果_*.xlsx",
-            "*平衡版*.xlsx", 
-            "*高精度*.xlsx"
-        ]
-        
-        for pattern in patterns:
-            files = list(self.results_path.glob(pattern))
-            for file in files:
+        # 單次掃描目錄，同時分類：提取結果_*.xlsx、*平衡版*.xlsx、*高精度*.xlsx
+        try:
+            entries = os.scandir(self.results_path)
+        except FileNotFoundError:
+            # 結果目錄不存在時視為沒有任何檔案
+            return []
+        
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".xlsx"):
+                    continue
+                if not (name.startswith("提取結果_") or "平衡版" in name or "高精度" in name):
+                    continue
+                
                 # 檢查檔名是否包含"無提取"
-                if "無提取" in file.name:
-                    excluded_files.append(file)
-                    print(f"   ⊗ 排除檔案: {file.name} (包含'無提取')")
+                if "無提取" in name:
+                    excluded_files.append(name)
+                    print(f"   ⊗ 排除檔案: {name} (包含'無提取')")
                 else:
-                    excel_files.append(file)
+                    excel_entries.append((entry.stat().st_mtime, Path(entry.path)))
         
         # 顯示排除統計
         if excluded_files:
             print(f"📋 排除了 {len(excluded_files)} 個'無提取'檔案")
         
-        # 去重並排序
-        unique_files = list(set(excel_files))
-        unique_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        # 按修改時間排序（單次掃描不會產生重複檔案）
+        excel_entries.sort(key=lambda item: item[0], reverse=True)
         
-        return unique_files
+        return [file_path for _, file_path in excel_entries]
     
     def _extract_company_from_filename(self, filename: str) -> Tuple[str, str, str]:
         """
@@ -171,8 +175,11 @@ class ESGDataConsolidator:
                 else:
                     version = "標準版"
                 
-                # 嘗試從Excel內容中讀取更詳細的信息作為備用
-                excel_company, excel_year = self._extract_company_info_from_excel(file_path)
+                # 檔名資訊不完整時才從Excel內容中讀取作為備用
+                if filename_company and filename_year:
+                    excel_company, excel_year = "", ""
+                else:
+                    excel_company, excel_year = self._extract_company_info_from_excel(file_path)
                 
                 # 決定最終使用的公司名稱和年度
                 final_company = filename_company if filename_company else excel_company
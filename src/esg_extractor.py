@@ -9,6 +9,7 @@ import json
 import re
 import os
 import sys
+import pickle
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Union, Tuple, Optional
@@ -24,7 +25,6 @@ from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.oxml.ns import qn
 
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document as LangchainDocument
 from langchain_google_genai import ChatGoogleGenerativeAI
 
@@ -815,6 +815,10 @@ class StockCodeMapper:
             if name in full_names:
                 for full_name in full_names[name]:
                     self.reverse_mapping[full_name] = code
+        
+        # 反向對照的子字串索引，避免模糊匹配時逐一掃描整個對照表
+        from preprocess import NameIndex
+        self._name_index = NameIndex(self.reverse_mapping)
     
     def extract_stock_info_from_vector_name(self, vector_name: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """
@@ -864,14 +868,15 @@ class StockCodeMapper:
         # 模糊匹配
         company_clean = company_name.replace("股份有限公司", "").replace("有限公司", "").replace("公司", "").strip()
         
-        for mapped_name, code in self.reverse_mapping.items():
-            if company_clean in mapped_name or mapped_name in company_clean:
-                return code
+        # （取對照表順序中第一個互相包含的名稱）
+        fuzzy_hits = self._name_index.names_in(company_clean) | self._name_index.names_containing(company_clean)
+        if fuzzy_hits:
+            return self.reverse_mapping[min(fuzzy_hits, key=self._name_index.rank.__getitem__)]
         
         # 關鍵字匹配
-        for mapped_name, code in self.reverse_mapping.items():
-            if len(mapped_name) >= 2 and mapped_name in company_name:
-                return code
+        keyword_hits = [name for name in self._name_index.names_in(company_name) if len(name) >= 2]
+        if keyword_hits:
+            return self.reverse_mapping[min(keyword_hits, key=self._name_index.rank.__getitem__)]
         
         return None
     
@@ -1092,20 +1097,34 @@ class EnhancedESGExtractor:
     # 以下方法大部分保持不變，只修改關鍵部分
     
     def _load_vector_database(self, db_path: str):
-        """載入向量資料庫"""
+        """
+        載入向量資料庫（索引盡量以記憶體映射方式讀取）
+        
+        IO_FLAG_MMAP只映射IVF倒排表；flat/SQ等索引的向量需faiss提供IO_FLAG_MMAP_IFC才會映射，
+        舊版faiss下這類索引仍會完整讀入記憶體
+        """
         if not os.path.exists(db_path):
             raise FileNotFoundError(f"向量資料庫不存在: {db_path}")
         
-        embeddings = HuggingFaceEmbeddings(
-            model_name=EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'}
-        )
-        db = FAISS.load_local(
-            db_path, 
-            embeddings, 
-            allow_dangerous_deserialization=True
-        )
-        return db
+        # 與預處理使用相同的裝置選擇（有CUDA則用GPU）；模型每個進程只載入一次，各報告共用
+        from preprocess import create_embedding_model
+        embeddings = create_embedding_model()
+        
+        import faiss
+        index_file = os.path.join(db_path, "index.faiss")
+        # IVF倒排表與（新版faiss支援時）flat向量都以mmap按需分頁載入
+        mmap_flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(index_file, mmap_flags)
+        except (RuntimeError, AttributeError):
+            # 索引類型或faiss版本不支援mmap時退回一般載入
+            index = faiss.read_index(index_file)
+        
+        # 與FAISS.save_local的格式一致：(docstore, index_to_docstore_id)
+        with open(os.path.join(db_path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
     
     def _document_retrieval(self, db, max_docs: int) -> List[LangchainDocument]:
         """文檔檢索 - 使用新的關鍵字配置"""
@@ -7,8 +7,8 @@ ESG報告書提取器 - 主程式 v2.0 增強版
 
 import os
 import sys
-import argparse
 import shutil
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
@@ -363,15 +363,19 @@ def run_preprocessing(pdf_files: list = None, force: bool = False) -> Optional[D
         # 檢查是否需要預處理
         if not force:
             from config import VECTOR_DB_PATH
-            existing_dbs = []
-            for pdf_file in pdf_files:
-                pdf_name = pdf_file.stem
-                db_path = os.path.join(
-                    os.path.dirname(VECTOR_DB_PATH),
-                    f"esg_db_{pdf_name}"
-                )
-                if os.path.exists(db_path):
-                    existing_dbs.append(pdf_file.name)
+            vector_db_dir = os.path.dirname(VECTOR_DB_PATH)
+            
+            # 單次掃描向量資料庫目錄，取代逐個文件的os.path.exists
+            try:
+                with os.scandir(vector_db_dir) as entries:
+                    existing_db_names = {entry.name for entry in entries if entry.is_dir()}
+            except FileNotFoundError:
+                existing_db_names = set()
+            
+            existing_dbs = [
+                pdf_file.name for pdf_file in pdf_files
+                if f"esg_db_{pdf_file.stem}" in existing_db_names
+            ]
             
             if existing_dbs and len(existing_dbs) == len(pdf_files):
                 print("ℹ️  所有文件的向量資料庫已存在，跳過預處理")
@@ -384,7 +388,7 @@ def run_preprocessing(pdf_files: list = None, force: bool = False) -> Optional[D
                     pdf_name = pdf_file.stem
                     metadata = metadata_extractor.extract_metadata(str(pdf_file))
                     docs_info[str(pdf_file)] = {
-                        'db_path': os.path.join(os.path.dirname(VECTOR_DB_PATH), f"esg_db_{pdf_name}"),
+                        'db_path': os.path.join(vector_db_dir, f"esg_db_{pdf_name}"),
                         'metadata': metadata,
                         'pdf_name': pdf_name
                     }
@@ -394,7 +398,8 @@ def run_preprocessing(pdf_files: list = None, force: bool = False) -> Optional[D
         print("   這可能需要幾分鐘時間，請耐心等待...")
         
         # 執行預處理
-        results = preprocess_multiple_documents([str(f) for f in pdf_files])
+        # 強制重建時一併刷新元數據快取
+        results = preprocess_multiple_documents([str(f) for f in pdf_files], refresh_cache=force)
         
         if results:
             print("✅ 預處理完成")
@@ -513,6 +518,16 @@ def run_consolidation() -> Optional[str]:
 # 顯示函數 - 更新支持Word文檔
 # =============================================================================
 
+_FILE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def _print_file_entries(entries: List[Tuple[Path, os.stat_result]]):
+    """顯示結果文件的名稱、修改時間和大小"""
+    for file, file_stat in entries:
+        file_time = time.strftime(_FILE_TIME_FORMAT, time.localtime(file_stat.st_mtime))
+        file_size = file_stat.st_size / 1024
+        print(f"   📄 {file.name}")
+        print(f"      🕒 {file_time} | 📏 {file_size:.1f}KB")
+
 def show_latest_results():
     """顯示最新結果"""
     if not CONFIG_LOADED:
@@ -520,56 +535,42 @@ def show_latest_results():
         return
     
     try:
-        import pandas as pd
-        
         results_dir = Path(RESULTS_PATH)
         if not results_dir.exists():
             print("❌ 結果目錄不存在")
             return
         
-        # 查找Excel和Word文件
-        excel_files = list(results_dir.glob("*.xlsx"))
-        word_files = list(results_dir.glob("*.docx"))
+        # 查找Excel和Word文件（每個文件只stat一次，排序和顯示共用）
+        excel_files = [(f, f.stat()) for f in results_dir.glob("*.xlsx")]
+        word_files = [(f, f.stat()) for f in results_dir.glob("*.docx")]
         
         if not excel_files and not word_files:
             print("❌ 沒有找到結果文件")
             return
         
         # 按修改時間排序
-        excel_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-        word_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        excel_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        word_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
         
         print("📊 最新結果文件")
         print("=" * 50)
         
         # 分類顯示Excel文件
-        consolidated_files = [f for f in excel_files if "彙整報告" in f.name]
-        extraction_files = [f for f in excel_files if "彙整報告" not in f.name]
+        consolidated_files = [item for item in excel_files if "彙整報告" in item[0].name]
+        extraction_files = [item for item in excel_files if "彙整報告" not in item[0].name]
         
         if consolidated_files:
             print("\n📊 彙整報告:")
-            for file in consolidated_files[:3]:
-                file_time = datetime.fromtimestamp(file.stat().st_mtime)
-                file_size = file.stat().st_size / 1024
-                print(f"   📄 {file.name}")
-                print(f"      🕒 {file_time.strftime('%Y-%m-%d %H:%M:%S')} | 📏 {file_size:.1f}KB")
+            _print_file_entries(consolidated_files[:3])
         
         if extraction_files:
             print("\n📊 提取結果 (Excel):")
-            for file in extraction_files[:5]:
-                file_time = datetime.fromtimestamp(file.stat().st_mtime)
-                file_size = file.stat().st_size / 1024
-                print(f"   📄 {file.name}")
-                print(f"      🕒 {file_time.strftime('%Y-%m-%d %H:%M:%S')} | 📏 {file_size:.1f}KB")
+            _print_file_entries(extraction_files[:5])
         
         # 顯示Word文件
         if word_files:
             print("\n📝 提取統整 (Word):")
-            for file in word_files[:5]:
-                file_time = datetime.fromtimestamp(file.stat().st_mtime)
-                file_size = file.stat().st_size / 1024
-                print(f"   📄 {file.name}")
-                print(f"      🕒 {file_time.strftime('%Y-%m-%d %H:%M:%S')} | 📏 {file_size:.1f}KB")
+            _print_file_entries(word_files[:5])
         
         # 統計信息
         print(f"\n📈 統計摘要:")
@@ -581,6 +582,22 @@ def show_latest_results():
     except Exception as e:
         print(f"❌ 查看結果失敗: {e}")
 
+_SYSTEM_INFO_TEMPLATE = """📋 ESG報告書提取器配置信息 v2.0
+==================================================
+🤖 Gemini模型: {gemini_model}
+🧠 Embedding模型: {embedding_model}
+📚 向量資料庫: {vector_db_path}
+📁 數據目錄: {data_path}
+📊 結果目錄: {results_path}
+🔢 文本塊大小: {chunk_size}
+🔍 搜索數量: {search_k}
+📏 信心分數閾值: {confidence_threshold}
+📄 最大處理文檔數: {max_docs}
+🤖 LLM增強: {llm_status}
+📝 Word文檔輸出: ✅ 支持
+🔧 提取器版本: v2.0 增強版
+"""
+
 def show_system_info():
     """顯示系統配置信息"""
     if not CONFIG_LOADED:
@@ -592,20 +609,20 @@ def show_system_info():
         CHUNK_SIZE, SEARCH_K, CONFIDENCE_THRESHOLD
     )
     
-    print("📋 ESG報告書提取器配置信息 v2.0")
-    print("=" * 50)
-    print(f"🤖 Gemini模型: {GEMINI_MODEL}")
-    print(f"🧠 Embedding模型: {EMBEDDING_MODEL}")
-    print(f"📚 向量資料庫: {VECTOR_DB_PATH}")
-    print(f"📁 數據目錄: {DATA_PATH}")
-    print(f"📊 結果目錄: {RESULTS_PATH}")
-    print(f"🔢 文本塊大小: {CHUNK_SIZE}")
-    print(f"🔍 搜索數量: {SEARCH_K}")
-    print(f"📏 信心分數閾值: {CONFIDENCE_THRESHOLD}")
-    print(f"📄 最大處理文檔數: {MAX_DOCS_PER_RUN}")
-    print(f"🤖 LLM增強: {'啟用' if ENABLE_LLM_ENHANCEMENT else '停用'}")
-    print(f"📝 Word文檔輸出: ✅ 支持")
-    print(f"🔧 提取器版本: v2.0 增強版")
+    # 一次格式化後單次寫出，避免逐行print
+    sys.stdout.write(_SYSTEM_INFO_TEMPLATE.format(
+        gemini_model=GEMINI_MODEL,
+        embedding_model=EMBEDDING_MODEL,
+        vector_db_path=VECTOR_DB_PATH,
+        data_path=DATA_PATH,
+        results_path=RESULTS_PATH,
+        chunk_size=CHUNK_SIZE,
+        search_k=SEARCH_K,
+        confidence_threshold=CONFIDENCE_THRESHOLD,
+        max_docs=MAX_DOCS_PER_RUN,
+        llm_status='啟用' if ENABLE_LLM_ENHANCEMENT else '停用'
+    ))
+    sys.stdout.flush()
 
 def show_usage_guide():
     """顯示使用說明"""
@@ -793,6 +810,96 @@ def interactive_menu():
         else:
             print("❌ 無效選擇，請輸入1-8之間的數字")
 
+# =============================================================================
+# 命令行模式
+# =============================================================================
+
+def _cmd_auto(force: bool = False, max_docs: int = None):
+    """自動執行完整流程：預處理 → 提取 → 彙整"""
+    if not check_environment():
+        print("❌ 環境檢查失敗，無法執行提取")
+        return
+    
+    docs_info = run_preprocessing(force=force)
+    if not docs_info:
+        return
+    
+    results = run_extraction(docs_info, max_docs)
+    if results and len(results) > 1:
+        run_consolidation()
+
+def _cmd_preprocess(force: bool = False, max_docs: int = None):
+    """僅執行預處理"""
+    run_preprocessing(force=force)
+
+def _cmd_extract(force: bool = False, max_docs: int = None):
+    """執行提取（必要時先預處理）"""
+    if not check_environment():
+        print("❌ 環境檢查失敗，無法執行提取")
+        return
+    
+    docs_info = run_preprocessing(force=force)
+    if docs_info:
+        run_extraction(docs_info, max_docs)
+
+def _cmd_consolidate(force: bool = False, max_docs: int = None):
+    """彙整多公司結果"""
+    run_consolidation()
+
+def _cmd_standardize(force: bool = False, max_docs: int = None):
+    """標準化PDF檔名"""
+    run_filename_standardization()
+
+def _cmd_results(force: bool = False, max_docs: int = None):
+    """查看最新結果"""
+    show_latest_results()
+
+def _cmd_info(force: bool = False, max_docs: int = None):
+    """顯示系統信息"""
+    show_system_info()
+
+_CLI_COMMANDS = {
+    "--auto": _cmd_auto,
+    "--preprocess": _cmd_preprocess,
+    "--extract": _cmd_extract,
+    "--consolidate": _cmd_consolidate,
+    "--standardize": _cmd_standardize,
+    "--results": _cmd_results,
+    "--info": _cmd_info,
+}
+
+def _build_arg_parser():
+    """建立完整的命令行參數解析器（僅在需要額外參數或說明時使用）"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="ESG報告書提取器 v2.0 增強版")
+    commands = parser.add_mutually_exclusive_group(required=True)
+    commands.add_argument("--auto", action="store_true", help="自動執行完整流程（預處理→提取→彙整）")
+    commands.add_argument("--preprocess", action="store_true", help="執行PDF預處理")
+    commands.add_argument("--extract", action="store_true", help="執行ESG數據提取")
+    commands.add_argument("--consolidate", action="store_true", help="彙整多公司結果")
+    commands.add_argument("--standardize", action="store_true", help="標準化PDF檔名")
+    commands.add_argument("--results", action="store_true", help="查看最新結果")
+    commands.add_argument("--info", action="store_true", help="顯示系統信息")
+    parser.add_argument("--force", action="store_true", help="強制重新預處理")
+    parser.add_argument("--max-docs", type=int, default=None, help="最大處理文檔數")
+    return parser
+
+def command_line_mode():
+    """命令行模式"""
+    args = sys.argv[1:]
+    
+    # 快速路徑：單一已知旗標直接分派，不需建立argparse解析器
+    if len(args) == 1 and args[0] in _CLI_COMMANDS:
+        _CLI_COMMANDS[args[0]]()
+        return
+    
+    parsed = _build_arg_parser().parse_args(args)
+    for flag, command in _CLI_COMMANDS.items():
+        if getattr(parsed, flag[2:]):
+            command(force=parsed.force, max_docs=parsed.max_docs)
+            return
+
 def main():
     """主函數"""
     print("📊 ESG報告書提取器 v2.0 增強版")
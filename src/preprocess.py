@@ -8,7 +8,16 @@ ESG報告書預處理模組 v1.0
 import os
 import re
 import sys
+import json
+import atexit
+import hashlib
+import importlib.util
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice, repeat
 from pathlib import Path
+from types import MappingProxyType
 from typing import List, Dict, Tuple, Optional
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -137,6 +146,175 @@ COMPLETE_COMPANY_MAPPING = {
     "萬國通路": ("9950", "萬國通"),
 }
 
+# 同一公司的所有別名共用同一個(代號, 簡稱)元組，並凍結映射表防止執行期修改
+_SHARED_COMPANY_ENTRIES = {}
+COMPLETE_COMPANY_MAPPING = MappingProxyType({
+    sys.intern(alias): _SHARED_COMPANY_ENTRIES.setdefault(entry, entry)
+    for alias, entry in COMPLETE_COMPANY_MAPPING.items()
+})
+
+# =============================================================================
+# 公司名稱索引
+# =============================================================================
+
+class NameIndex:
+    """名稱集合的子字串索引，避免每次查詢都線性掃描整個名稱表"""
+    
+    def __init__(self, names):
+        """
+        Args:
+            names: 有序的名稱集合，順序即名稱的優先順序（rank）
+        """
+        self.rank = {name: rank for rank, name in enumerate(names)}
+        self._lengths = sorted({len(name) for name in self.rank})
+        
+        # 名稱的所有子字串 → 包含該子字串的名稱
+        self._names_by_substring = {}
+        for name in self.rank:
+            for start in range(len(name) + 1):
+                for end in range(start, len(name) + 1):
+                    self._names_by_substring.setdefault(name[start:end], set()).add(name)
+    
+    def names_in(self, text: str) -> set:
+        """找出text中出現的所有名稱"""
+        hits = set()
+        for start in range(len(text)):
+            for length in self._lengths:
+                if start + length > len(text):
+                    break
+                window = text[start:start + length]
+                if window in self.rank:
+                    hits.add(window)
+        return hits
+    
+    def names_containing(self, text: str) -> set:
+        """找出包含text的所有名稱"""
+        return self._names_by_substring.get(text, set())
+
+def _build_stock_code_index() -> Dict[str, List[str]]:
+    """建立股票代號 → 別名的索引"""
+    aliases_by_stock_code = {}
+    for alias, (stock_code, _) in COMPLETE_COMPANY_MAPPING.items():
+        if stock_code:
+            aliases_by_stock_code.setdefault(stock_code, []).append(alias)
+    return aliases_by_stock_code
+
+_ALIAS_INDEX = NameIndex(COMPLETE_COMPANY_MAPPING)
+_ALIASES_BY_STOCK_CODE = _build_stock_code_index()
+_STOCK_CODE_LENGTHS = sorted({len(code) for code in _ALIASES_BY_STOCK_CODE})
+
+def _find_aliases_in(text: str) -> List[str]:
+    """找出text中出現的所有已知公司別名（較長、較具體的別名優先，同長度依映射表順序）"""
+    # 例如「國喬特」同時包含「國喬」，應優先對應到「國喬特」
+    return sorted(_ALIAS_INDEX.names_in(text), key=lambda alias: (-len(alias), _ALIAS_INDEX.rank[alias]))
+
+def _find_aliases_containing(text: str) -> List[str]:
+    """找出包含text的所有已知公司別名（依映射表順序）"""
+    return sorted(_ALIAS_INDEX.names_containing(text), key=_ALIAS_INDEX.rank.__getitem__)
+
+def _find_aliases_by_stock_code(text: str) -> List[str]:
+    """找出text中出現的股票代號所對應的別名（依映射表順序）"""
+    hits = []
+    for start in range(len(text)):
+        for length in _STOCK_CODE_LENGTHS:
+            hits.extend(_ALIASES_BY_STOCK_CODE.get(text[start:start + length], ()))
+    return sorted(set(hits), key=_ALIAS_INDEX.rank.__getitem__)
+
+# =============================================================================
+# 元數據快取
+# =============================================================================
+
+# 只快取解析PDF所得、已正規化的前3000字，以PDF內容（前64KB雜湊+檔案大小）為鍵：
+# 檔名提示與備用值每次重新套用，改名或移動目錄後仍可命中且結果反映新檔名。
+# 鍵另含提取邏輯版本和PDF_LOADER：修改文字擷取方式時請遞增_EXTRACTOR_VERSION，舊條目即自動失效
+_EXTRACTOR_VERSION = 2
+METADATA_CACHE_PATH = Path(VECTOR_DB_PATH).parent / "metadata_cache.json"
+_metadata_cache = None
+# 本進程新增、尚未寫回磁碟的條目
+_metadata_cache_updates = {}
+
+def _metadata_cache_key(pdf_path: str) -> Optional[str]:
+    """計算PDF的快取鍵，無法讀取時返回None"""
+    try:
+        with open(pdf_path, 'rb') as f:
+            head_digest = hashlib.sha1(f.read(65536)).hexdigest()
+        return f"v{_EXTRACTOR_VERSION}:{PDF_LOADER}:{head_digest}:{os.path.getsize(pdf_path)}"
+    except OSError:
+        return None
+
+def _get_metadata_cache() -> Dict[str, str]:
+    """取得元數據快取（首次使用時從磁碟載入）"""
+    global _metadata_cache
+    if _metadata_cache is None:
+        try:
+            with open(METADATA_CACHE_PATH, 'r', encoding='utf-8') as f:
+                _metadata_cache = json.load(f)
+        except (OSError, ValueError):
+            _metadata_cache = {}
+    return _metadata_cache
+
+def _take_metadata_cache_updates() -> Dict[str, str]:
+    """取出本進程新增的快取條目，隨處理結果交回主進程統一寫檔"""
+    global _metadata_cache_updates
+    updates, _metadata_cache_updates = _metadata_cache_updates, {}
+    return updates
+
+def _save_metadata_cache(updates: Dict[str, str] = None):
+    """
+    將新增的快取條目一次寫回磁碟（併入其他進程已寫入的條目）
+    
+    Args:
+        updates: 工作進程交回的快取條目（可選）
+    """
+    if updates:
+        _get_metadata_cache().update(updates)
+        _metadata_cache_updates.update(updates)
+    if not _metadata_cache_updates:
+        return
+    
+    try:
+        METADATA_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(METADATA_CACHE_PATH, 'r', encoding='utf-8') as f:
+                merged_cache = json.load(f)
+        except (OSError, ValueError):
+            merged_cache = {}
+        merged_cache.update(_metadata_cache_updates)
+        
+        # 每個進程使用各自的暫存檔，避免並行寫入互相覆蓋
+        temp_path = METADATA_CACHE_PATH.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(merged_cache, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, METADATA_CACHE_PATH)
+        _metadata_cache_updates.clear()
+    except OSError as e:
+        print(f"⚠️ 無法寫入元數據快取: {e}")
+
+# 單獨呼叫extract_metadata（非批量處理）時，於程式結束前寫回一次。
+# 工作進程（spawn模式下同樣會執行此掛鉤）的條目已隨結果取出，結束時不會再寫檔
+atexit.register(_save_metadata_cache)
+
+# =============================================================================
+# PDF載入
+# =============================================================================
+
+def _resolve_pdf_loader_cls():
+    """依PDF_LOADER決定PDF載入器類別，pymupdf未安裝時退回PyPDFLoader"""
+    if PDF_LOADER == "pymupdf":
+        if importlib.util.find_spec("fitz") is not None:
+            from langchain_community.document_loaders import PyMuPDFLoader
+            return PyMuPDFLoader
+        print("⚠️ 未安裝pymupdf，改用pypdf解析")
+    
+    return PyPDFLoader
+
+# 每個進程只決定一次，不必每個PDF重新檢查（也只警告一次）
+_PDF_LOADER_CLS = _resolve_pdf_loader_cls()
+
+def _create_pdf_loader(pdf_path: str):
+    """建立PDF載入器"""
+    return _PDF_LOADER_CLS(pdf_path)
+
 # =============================================================================
 # 文檔元數據提取器
 # =============================================================================
@@ -144,16 +322,40 @@ COMPLETE_COMPANY_MAPPING = {
 class DocumentMetadataExtractor:
     """文檔元數據提取器"""
     
+    # 預編譯的清理和驗證模式（所有實例共用）
+    _WHITESPACE_RE = re.compile(r'\s+')
+    # 前後的空白、數字、特殊符號與常見無關詞彙合併為一個前綴和一個後綴模式
+    _NOISE_WORDS = '報告|書|永續|ESG|企業社會責任|第|章|節|頁|附錄|目錄'
+    _LEADING_NOISE_RE = re.compile(rf'^[\s\d\-\.。，,\(\)（）【】]*(?:{_NOISE_WORDS})*')
+    _TRAILING_NOISE_RE = re.compile(rf'(?:{_NOISE_WORDS})*[\s\-\.。，,\(\)（）【】]*$')
+    _INVALID_NAME_RES = [
+        re.compile(r'^[0-9\.\-\s]+$'),  # 純數字或符號
+        re.compile(r'^[a-zA-Z\s]+$'),   # 純英文
+        re.compile(r'第.*?章|第.*?節|頁.*?碼'),  # 章節頁碼
+    ]
+    _FILENAME_YEAR_RES = [
+        re.compile(r'(202[0-9])'),
+        re.compile(r'(20[12][0-9])'),
+    ]
+    _PDF_EXT_RE = re.compile(r'\.pdf$', re.IGNORECASE)
+    # 年份（20[12]x涵蓋202x）與常見關鍵詞合併為一個模式，單次掃描即可去除
+    _FILENAME_KEYWORD_RE = re.compile(
+        '|'.join([r'20[12][0-9]'] + list(map(re.escape, ['ESG', '永續', '報告', '書', '企業社會責任', '_', '-', '提取', '結果']))),
+        re.IGNORECASE
+    )
+    _FILENAME_SEPARATOR_RE = re.compile(r'[_\-\s]+')
+    
     def __init__(self):
         # 公司名稱匹配模式
-        self.company_patterns = [
+        company_patterns = [
             # 高優先級：包含完整報告標題的模式
+            # （公司名稱可從任意位置起算，中間間隔限制在200字內，避免整段文本的二次方回溯）
             r'([^,\n\d]{2,25}?)(?:股份)?有限公司\s*(202[0-9])\s*年(?:度)?(?:永續|ESG|企業社會責任)報告',
-            r'([^,\n\d]{2,25}?)(?:股份)?有限公司.*?(202[0-9]).*?(?:永續|ESG|企業社會責任)報告',
+            r'([^,\n\d]{2,25}?)(?:股份)?有限公司.{0,200}?(202[0-9]).{0,200}?(?:永續|ESG|企業社會責任)報告',
             
             # 中優先級：公司名稱+報告類型
-            r'([^,\n\d]{2,25}?)(?:股份)?有限公司.*?(?:永續|ESG|企業社會責任)報告',
-            r'([^,\n\d]{2,25}?)公司.*?(?:202[0-9]).*?(?:永續|ESG|企業社會責任)報告',
+            r'([^,\n\d]{2,25}?)(?:股份)?有限公司.{0,200}?(?:永續|ESG|企業社會責任)報告',
+            r'([^,\n\d]{2,25}?)公司.{0,200}?(?:202[0-9]).{0,200}?(?:永續|ESG|企業社會責任)報告',
             
             # 低優先級：僅公司名稱
             r'([\u4e00-\u9fff]{2,15})(?:股份)?有限公司',
@@ -161,7 +363,7 @@ class DocumentMetadataExtractor:
         ]
         
         # 年度匹配模式
-        self.year_patterns = [
+        year_patterns = [
             # 高精確度：明確的報告年度表達
             r'(202[0-9])\s*年(?:度)?(?:永續|ESG|企業社會責任)報告(?:書)?',
             r'(?:永續|ESG|企業社會責任)報告(?:書)?.*?(202[0-9])\s*年(?:度)?',
@@ -182,121 +384,198 @@ class DocumentMetadataExtractor:
             # 最低優先級：任何四位數年份
             r'(202[0-9])',
         ]
-    
-    def extract_metadata(self, pdf_path: str) -> Dict[str, str]:
+        
+        # 各模式匹配成功所必需的字面字串，文本中缺少時可直接跳過該模式的正則掃描
+        self.company_required_literals = [
+            ('有限公司', '202', '報告'),
+            ('有限公司', '202', '報告'),
+            ('有限公司', '報告'),
+            ('公司', '202', '報告'),
+            ('有限公司',),
+            ('公司',),
+        ]
+        self.year_required_literals = [
+            ('202', '報告'),
+            ('202', '報告'),
+            ('202', '報告'),
+            ('202', '報告'),
+            ('202', '年報'),
+            ('202', '年報'),
+            ('202', '期間'),
+            ('202', '財政年度'),
+            ('202', '會計年度'),
+            ('202',),
+        ]
+        
+        # 預編譯所有模式，避免每次匹配都查找re內部快取
+        # 只有含英文字母（ESG）的模式需要忽略大小寫，純中文模式省去逐字大小寫轉換
+        self.company_patterns = [self._compile_pattern(p) for p in company_patterns]
+        self.year_patterns = [self._compile_pattern(p) for p in year_patterns]
+    
+    @staticmethod
+    def _compile_pattern(pattern: str):
+        """編譯元數據模式，含ESG時才加上IGNORECASE"""
+        flags = re.MULTILINE
+        if 'ESG' in pattern:
+            flags |= re.IGNORECASE
+        return re.compile(pattern, flags)
+    
+    def extract_metadata(self, pdf_path: str, pages: list = None,
+                         refresh_cache: bool = False) -> Dict[str, str]:
         """
         提取文檔元數據
         
+        Args:
+            pages: 已載入的PDF頁面（可選），提供時直接取前8頁，不再重新解析PDF
+            refresh_cache: 忽略既有快取並以重新提取的結果覆蓋
+        
         Returns:
             Dict包含 'company_name' 和 'report_year'
         """
-        print(f"📋 提取文檔元數據: {Path(pdf_path).name}")
+        pdf_file = Path(pdf_path)
+        print(f"📋 提取文檔元數據: {pdf_file.name}")
         
         try:
-            loader = PyPDFLoader(pdf_path)
-            pages = loader.load()
-            
-            # 檢查前8頁
-            text_for_extraction = ""
-            pages_to_check = min(8, len(pages))
+            text_clean = self._get_text_for_extraction(pdf_path, pages, refresh_cache)
             
-            for page in pages[:pages_to_check]:
-                text_for_extraction += page.page_content + "\n"
-            
-            # 先嘗試從文件名提取作為參考
-            filename_metadata = self._extract_from_filename(Path(pdf_path).name)
+            # 先嘗試從文件名提取作為參考（不快取，改名後即反映新檔名）
+            filename_metadata = self._extract_from_filename(pdf_file.name)
             
             # 提取公司名稱和報告年度
-            company_name = self._extract_company_name(text_for_extraction, filename_metadata.get('company_name', ''))
-            report_year = self._extract_report_year(text_for_extraction, filename_metadata.get('report_year', ''))
+            company_name = self._extract_company_name(text_clean, filename_metadata.get('company_name', ''))
+            report_year = self._extract_report_year(text_clean, filename_metadata.get('report_year', ''))
             
             # 如果仍無法提取到有效信息，使用文件名作為備用
             if not company_name or company_name == "未知公司":
-                company_name = filename_metadata.get('company_name', Path(pdf_path).stem)
+                company_name = filename_metadata.get('company_name', pdf_file.stem)
             
             if not report_year or report_year == "未知年度":
                 report_year = filename_metadata.get('report_year', '未知年度')
             
-            result = {
+            print(f"✅ 提取到：{company_name} - {report_year}")
+            return {
                 'company_name': company_name,
                 'report_year': report_year
             }
             
-            print(f"✅ 提取到：{company_name} - {report_year}")
-            return result
-            
         except Exception as e:
             print(f"⚠️ 元數據提取失敗: {e}")
             return {
-                'company_name': Path(pdf_path).stem,
+                'company_name': pdf_file.stem,
                 'report_year': '未知年度'
             }
     
-    def _extract_company_name(self, text: str, filename_hint: str = "") -> str:
-        """提取公司名稱"""
-        text_clean = re.sub(r'\s+', ' ', text[:3000])
+    def _get_text_for_extraction(self, pdf_path: str, pages: list = None,
+                                 refresh_cache: bool = False) -> str:
+        """取得PDF前3000字並正規化空白（內容未變時直接使用快取，不再解析PDF）"""
+        cache = _get_metadata_cache()
+        cache_key = _metadata_cache_key(pdf_path)
+        if cache_key and not refresh_cache and cache_key in cache:
+            print("✅ 使用快取的PDF文字")
+            return cache[cache_key]
+        
+        # 檢查前8頁（未提供頁面時逐頁惰性解析，不載入整份PDF）
+        if pages is None:
+            pages = _create_pdf_loader(pdf_path).lazy_load()
         
+        # 只會用到前3000字：湊足後即停止，不再串接（或解析）後續頁面
+        page_texts = []
+        text_length = 0
+        for page in islice(pages, 8):
+            page_texts.append(f"{page.page_content}\n")
+            text_length += len(page_texts[-1])
+            if text_length >= 3000:
+                break
+        
+        # 只正規化一次前3000字，供公司名稱和報告年度共用
+        text_clean = self._WHITESPACE_RE.sub(' ', "".join(page_texts)[:3000])
+        
+        # 只記在記憶體中，由批量處理結束時（或程式結束時）統一寫回磁碟
+        if cache_key:
+            cache[cache_key] = text_clean
+            _metadata_cache_updates[cache_key] = text_clean
+        
+        return text_clean
+    
+    def _extract_company_name(self, text_clean: str, filename_hint: str = "") -> str:
+        """提取公司名稱（text_clean為已正規化空白的前3000字）"""
         best_match = ""
         best_confidence = 0
         
         for i, pattern in enumerate(self.company_patterns):
-            matches = re.findall(pattern, text_clean, re.IGNORECASE | re.MULTILINE)
-            
-            if matches:
-                for match in matches:
-                    if isinstance(match, tuple):
-                        company_candidate = match[0].strip()
-                    else:
-                        company_candidate = match.strip()
+            # 模式依優先級排列，之後的模式信心度不可能超過目前最佳時提前結束
+            max_confidence = (len(self.company_patterns) - i) / len(self.company_patterns) + 0.2
+            if best_confidence >= max_confidence:
+                break
+            
+            # 缺少必要字面字串時不可能匹配
+            if not all(literal in text_clean for literal in self.company_required_literals[i]):
+                continue
+            
+            # 所有模式的第1組皆為公司名稱
+            for match in pattern.finditer(text_clean):
+                company_candidate = match.group(1).strip()
+                
+                # 清理公司名稱
+                company_candidate = self._clean_company_name(company_candidate)
+                
+                if self._is_valid_company_name(company_candidate):
+                    # 計算信心度
+                    confidence = (len(self.company_patterns) - i) / len(self.company_patterns)
                     
-                    # 清理公司名稱
-                    company_candidate = self._clean_company_name(company_candidate)
+                    # 如果與檔名提示匹配，加分
+                    if filename_hint and filename_hint in company_candidate:
+                        confidence += 0.2
                     
-                    if self._is_valid_company_name(company_candidate):
-                        # 計算信心度
-                        confidence = (len(self.company_patterns) - i) / len(self.company_patterns)
-                        
-                        # 如果與檔名提示匹配，加分
-                        if filename_hint and filename_hint in company_candidate:
-                            confidence += 0.2
-                        
-                        if confidence > best_confidence:
-                            best_match = company_candidate
-                            best_confidence = confidence
+                    if confidence > best_confidence:
+                        best_match = company_candidate
+                        best_confidence = confidence
         
         return best_match if best_match else ""
     
-    def _extract_report_year(self, text: str, filename_hint: str = "") -> str:
-        """提取報告年度"""
-        text_clean = re.sub(r'\s+', ' ', text[:3000])
-        
+    def _extract_report_year(self, text_clean: str, filename_hint: str = "") -> str:
+        """提取報告年度（text_clean為已正規化空白的前3000字）"""
         best_year = ""
+        best_year_int = 0
         best_confidence = 0
         
         for i, pattern in enumerate(self.year_patterns):
-            matches = re.findall(pattern, text_clean, re.IGNORECASE | re.MULTILINE)
+            # 模式依優先級排列，之後的模式信心度不可能達到目前最佳時提前結束
+            # （信心度相同時仍可能以較新年度取代，因此使用嚴格大於）
+            max_confidence = (len(self.year_patterns) - i) / len(self.year_patterns)
+            if i < 4:
+                max_confidence += 0.3
+            max_confidence += 0.2
+            if best_confidence > max_confidence:
+                break
+            
+            # 缺少必要字面字串時不可能匹配
+            if not all(literal in text_clean for literal in self.year_required_literals[i]):
+                continue
             
-            if matches:
-                for match in matches:
-                    year_candidate = match if isinstance(match, str) else match[0]
+            # 所有模式的第1組皆為年份
+            for match in pattern.finditer(text_clean):
+                year_candidate = match.group(1)
+                
+                # 驗證年份合理性
+                if self._is_valid_year(year_candidate):
+                    # 計算信心度
+                    confidence = (len(self.year_patterns) - i) / len(self.year_patterns)
+                    
+                    # 特別加分：如果是明確的報告書年度表達
+                    if i < 4:
+                        confidence += 0.3
                     
-                    # 驗證年份合理性
-                    if self._is_valid_year(year_candidate):
-                        # 計算信心度
-                        confidence = (len(self.year_patterns) - i) / len(self.year_patterns)
-                        
-                        # 特別加分：如果是明確的報告書年度表達
-                        if i < 4:
-                            confidence += 0.3
-                        
-                        # 如果與檔名提示匹配，加分
-                        if filename_hint and year_candidate == filename_hint:
-                            confidence += 0.2
-                        
-                        # 優先選擇較新的年度
-                        if confidence > best_confidence or (confidence == best_confidence and int(year_candidate) > int(best_year or "0")):
-                            best_year = year_candidate
-                            best_confidence = confidence
+                    # 如果與檔名提示匹配，加分
+                    if filename_hint and year_candidate == filename_hint:
+                        confidence += 0.2
+                    
+                    # 優先選擇較新的年度
+                    year_int = int(year_candidate)
+                    if confidence > best_confidence or (confidence == best_confidence and year_int > best_year_int):
+                        best_year = year_candidate
+                        best_year_int = year_int
+                        best_confidence = confidence
         
         return best_year if best_year else ""
     
@@ -305,59 +584,37 @@ class DocumentMetadataExtractor:
         if not raw_name:
             return ""
         
-        # 去除前後的空白、數字、特殊符號
-        cleaned = re.sub(r'^[\s\d\-\.。，,\(\)（）【】]+', '', raw_name)
-        cleaned = re.sub(r'[\s\-\.。，,\(\)（）【】]+$', '', cleaned)
-        
-        # 去除常見的無關詞彙
-        noise_words = [
-            '報告', '書', '永續', 'ESG', '企業社會責任', 
-            '第', '章', '節', '頁', '附錄', '目錄'
-        ]
-        for word in noise_words:
-            cleaned = re.sub(f'^{word}', '', cleaned)
-            cleaned = re.sub(f'{word}$', '', cleaned)
+        # 去除前後的空白、數字、特殊符號和常見的無關詞彙（前後各一次錨定替換）
+        cleaned = self._LEADING_NOISE_RE.sub('', raw_name, count=1)
+        cleaned = self._TRAILING_NOISE_RE.sub('', cleaned, count=1)
         
         return cleaned.strip()
     
-    def _is_valid_company_name(self, name: str) -> bool:
-        """驗證公司名稱的有效性"""
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _is_valid_company_name(name: str) -> bool:
+        """驗證公司名稱的有效性（同一候選名稱在各頁重複出現，結果快取）"""
         if not name or len(name) < 2 or len(name) > 25:
             return False
         
         # 排除明顯不是公司名稱的詞彙
-        invalid_patterns = [
-            r'^[0-9\.\-\s]+$',  # 純數字或符號
-            r'^[a-zA-Z\s]+$',   # 純英文
-            r'第.*?章|第.*?節|頁.*?碼',  # 章節頁碼
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.match(pattern, name):
+        for pattern in DocumentMetadataExtractor._INVALID_NAME_RES:
+            if pattern.match(name):
                 return False
         
         return True
     
     def _is_valid_year(self, year: str) -> bool:
         """驗證年份的有效性"""
-        try:
-            year_int = int(year)
-            return 2015 <= year_int <= 2030
-        except ValueError:
-            return False
+        return year.isdecimal() and 2015 <= int(year) <= 2030
     
     def _extract_from_filename(self, filename: str) -> Dict[str, str]:
         """從文件名提取元數據作為輔助信息"""
         result = {'company_name': '', 'report_year': ''}
         
         # 提取年份
-        year_patterns = [
-            r'(202[0-9])',
-            r'(20[12][0-9])',
-        ]
-        
-        for pattern in year_patterns:
-            year_match = re.search(pattern, filename)
+        for pattern in self._FILENAME_YEAR_RES:
+            year_match = pattern.search(filename)
             if year_match:
                 result['report_year'] = year_match.group(1)
                 break
@@ -366,22 +623,13 @@ class DocumentMetadataExtractor:
         company_part = filename
         
         # 去除副檔名
-        company_part = re.sub(r'\.pdf$', '', company_part, flags=re.IGNORECASE)
+        company_part = self._PDF_EXT_RE.sub('', company_part)
         
-        # 去除年份
-        company_part = re.sub(r'202[0-9]', '', company_part)
-        company_part = re.sub(r'20[12][0-9]', '', company_part)
-        
-        # 去除常見關鍵詞
-        keywords_to_remove = [
-            'ESG', 'esg', '永續', '報告', '書', '企業社會責任', 
-            '_', '-', '提取', '結果'
-        ]
-        for keyword in keywords_to_remove:
-            company_part = re.sub(keyword, '', company_part, flags=re.IGNORECASE)
+        # 去除年份和常見關鍵詞（單次掃描）
+        company_part = self._FILENAME_KEYWORD_RE.sub('', company_part)
         
         # 清理剩餘的符號和空白
-        company_part = re.sub(r'[_\-\s]+', ' ', company_part).strip()
+        company_part = self._FILENAME_SEPARATOR_RE.sub(' ', company_part).strip()
         
         if company_part and len(company_part) >= 2:
             result['company_name'] = company_part
@@ -392,58 +640,122 @@ class DocumentMetadataExtractor:
 # 檔名標準化功能
 # =============================================================================
 
+# 預編譯的檔名處理模式
+_ESG_REPORT_SUFFIX_RE = re.compile(r'_esg報告書.*$', re.IGNORECASE)
+_YEAR_SUFFIX_RES = [re.compile(rf'_{year}.*$') for year in ('2024', '2023', '2022')]
+_YEAR_ONLY_RE = re.compile(r'^202[0-9]$')
+_YEAR_RE = re.compile(r'(202[0-9])')
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ESG_TAIL_RE = re.compile(r'_esg.*$', re.IGNORECASE)
+_YEAR_TAIL_RE = re.compile(r'_202[0-9].*$')
+_PDF_COMPANY_SUFFIX_RE = re.compile(r'股份有限公司|有限公司|公司|工業|化學|塑膠')
+_FILENAME_PART_SEPARATOR_RE = re.compile(r'[_\- 年]|esg|ESG|報告|書')
+
+# 檔名候選公司數量上限（下游依序嘗試，只會用到最前面的候選）
+MAX_FILENAME_CANDIDATES = 5
+
 def smart_extract_company_from_filename(filename: str) -> List[str]:
-    """智能從檔名提取公司名稱候選"""
-    candidates = []
+    """智能從檔名提取公司名稱候選（依策略優先順序排列）"""
+    # 以dict去重並保留加入順序
+    candidates = {}
     
     # 移除副檔名和常見後綴
     name = filename.replace('.pdf', '').replace('.PDF', '')
-    name = re.sub(r'_esg報告書.*$', '', name, flags=re.IGNORECASE)
-    name = re.sub(r'_2024.*$', '', name)
-    name = re.sub(r'_2023.*$', '', name)
-    name = re.sub(r'_2022.*$', '', name)
+    name = _ESG_REPORT_SUFFIX_RE.sub('', name)
+    for pattern in _YEAR_SUFFIX_RES:
+        name = pattern.sub('', name)
     
     # 策略1：檢查是否包含已知公司名稱
-    for company_name in COMPLETE_COMPANY_MAPPING.keys():
-        if company_name in filename:
-            candidates.append(company_name)
-    
-    # 策略2：分割檔名並檢查每個部分
-    separators = ['_', '-', ' ', '年', 'esg', 'ESG', '報告', '書']
-    parts = [name]
-    
-    for sep in separators:
-        new_parts = []
-        for part in parts:
-            new_parts.extend(part.split(sep))
-        parts = new_parts
-    
-    # 清理和過濾部分
-    clean_parts = []
-    for part in parts:
-        part = part.strip()
-        if len(part) >= 2 and not part.isdigit() and not re.match(r'^202[0-9]$', part):
-            clean_parts.append(part)
-    
-    # 檢查每個部分是否為已知公司
+    candidates.update(dict.fromkeys(_find_aliases_in(filename)))
+    if len(candidates) >= MAX_FILENAME_CANDIDATES:
+        return list(candidates)[:MAX_FILENAME_CANDIDATES]
+    
+    # 策略2：分割檔名並檢查每個部分（單次正則分割所有分隔符）
+    parts = _FILENAME_PART_SEPARATOR_RE.split(name)
+    
+    # 清理和過濾部分（惰性產生，提前結束時不處理剩餘部分）
+    clean_parts = (
+        part for part in map(str.strip, parts)
+        if len(part) >= 2 and not part.isdigit() and not _YEAR_ONLY_RE.match(part)
+    )
+    
+    # 檢查每個部分是否為已知公司（部分包含別名，或別名包含部分）
     for part in clean_parts:
-        for company_name in COMPLETE_COMPANY_MAPPING.keys():
-            if company_name in part or part in company_name:
-                if len(company_name) >= 2:
-                    candidates.append(company_name)
+        for company_name in _find_aliases_in(part) + _find_aliases_containing(part):
+            if len(company_name) >= 2:
+                candidates[company_name] = None
+        if len(candidates) >= MAX_FILENAME_CANDIDATES:
+            return list(candidates)[:MAX_FILENAME_CANDIDATES]
     
     # 策略3：檢查檔名中是否包含股票代號
-    for company_name, (stock_code, standard_name) in COMPLETE_COMPANY_MAPPING.items():
-        if stock_code and stock_code in filename:
-            candidates.append(company_name)
+    candidates.update(dict.fromkeys(_find_aliases_by_stock_code(filename)))
     
-    return list(set(candidates))  # 去重
+    return list(candidates)[:MAX_FILENAME_CANDIDATES]
 
 def extract_year_from_filename(filename: str) -> str:
     """從檔名提取年度"""
-    year_match = re.search(r'(202[0-9])', filename)
+    year_match = _YEAR_RE.search(filename)
     return year_match.group(1) if year_match else ""
 
+def _scan_filename(filename: str) -> Tuple[List[str], str]:
+    """一次取得檔名的公司候選和年度，返回 (candidates, year)"""
+    return smart_extract_company_from_filename(filename), extract_year_from_filename(filename)
+
+# 每個進程共用一個元數據提取器，避免每個PDF重新建立正則模式
+_metadata_extractor = None
+
+def _get_metadata_extractor() -> DocumentMetadataExtractor:
+    """取得本進程共用的元數據提取器（首次使用時建立）"""
+    global _metadata_extractor
+    if _metadata_extractor is None:
+        _metadata_extractor = DocumentMetadataExtractor()
+    return _metadata_extractor
+
+def _extract_pdf_metadata(pdf_path: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    提取單個PDF的元數據（頂層函數，供進程池調用）
+    
+    Returns:
+        (metadata, 新增的快取條目)
+    """
+    metadata = _get_metadata_extractor().extract_metadata(pdf_path)
+    return metadata, _take_metadata_cache_updates()
+
+def _extract_metadata_parallel(pdf_paths: List[str]) -> Dict[str, object]:
+    """
+    使用進程池並行提取多個PDF的元數據
+    
+    Returns:
+        Dict: {pdf_path: 元數據dict，或提取時拋出的例外}
+    """
+    results = {}
+    cache_updates = {}
+    max_workers = max(1, min(PREPROCESS_WORKERS, len(pdf_paths)))
+    
+    if max_workers == 1:
+        for pdf_path in pdf_paths:
+            try:
+                results[pdf_path], updates = _extract_pdf_metadata(pdf_path)
+                cache_updates.update(updates)
+            except Exception as e:
+                results[pdf_path] = e
+    else:
+        print(f"⚡ 使用 {max_workers} 個進程並行提取PDF元數據...")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {pdf_path: executor.submit(_extract_pdf_metadata, pdf_path) for pdf_path in pdf_paths}
+            for pdf_path, future in futures.items():
+                try:
+                    results[pdf_path], updates = future.result()
+                    cache_updates.update(updates)
+                except Exception as e:
+                    results[pdf_path] = e
+    
+    # 整批只寫一次元數據快取
+    _save_metadata_cache(cache_updates)
+    
+    return results
+
 def standardize_pdf_filenames(data_path: str = None) -> Dict[str, str]:
     """
     標準化PDF檔名為：代號_公司名_年度_esg報告書.pdf
@@ -466,30 +778,25 @@ def standardize_pdf_filenames(data_path: str = None) -> Dict[str, str]:
     print("📋 支援台灣上市櫃公司代號識別")
     print("=" * 60)
     
-    metadata_extractor = DocumentMetadataExtractor()
+    # 先分析所有檔名，只有無法同時確定公司和年度的PDF才需要解析內容（並行處理）
+    filename_scans = {pdf_file: _scan_filename(pdf_file.name) for pdf_file in pdf_files}
+    pdf_paths_to_extract = [
+        str(pdf_file) for pdf_file, (candidates, year) in filename_scans.items()
+        if not (year and any(candidate in COMPLETE_COMPANY_MAPPING for candidate in candidates))
+    ]
+    pdf_metadata = _extract_metadata_parallel(pdf_paths_to_extract) if pdf_paths_to_extract else {}
+    
     rename_mapping = {}
     
+    # 重命名在主進程依序執行，避免檔名衝突檢查出現競爭
     for pdf_file in pdf_files:
         try:
             print(f"\n📄 處理: {pdf_file.name}")
             
-            # 策略1：從檔名智能提取公司
-            filename_candidates = smart_extract_company_from_filename(pdf_file.name)
+            # 策略1、2：從檔名智能提取公司和年度
+            filename_candidates, filename_year = filename_scans[pdf_file]
             print(f"   📝 檔名分析候選: {filename_candidates}")
             
-            # 策略2：從PDF內容提取
-            try:
-                metadata = metadata_extractor.extract_metadata(str(pdf_file))
-                pdf_company = metadata['company_name']
-                pdf_year = metadata['report_year']
-                print(f"   📄 PDF提取: 公司={pdf_company}, 年度={pdf_year}")
-            except Exception as e:
-                print(f"   ⚠️ PDF提取失敗: {e}")
-                pdf_company = "未知公司"
-                pdf_year = ""
-            
-            # 策略3：從檔名提取年度
-            filename_year = extract_year_from_filename(pdf_file.name)
             if filename_year:
                 print(f"   📅 檔名提取年度: {filename_year}")
             
@@ -505,19 +812,32 @@ def standardize_pdf_filenames(data_path: str = None) -> Dict[str, str]:
                         print(f"   ✅ 檔名匹配: {stock_code} {standard_name}")
                         break
             
+            # 策略3：檔名無法同時確定公司和年度時，才從PDF內容提取
+            if stock_code and filename_year:
+                pdf_company = "未知公司"
+                pdf_year = ""
+            else:
+                metadata = pdf_metadata[str(pdf_file)]
+                if isinstance(metadata, Exception):
+                    print(f"   ⚠️ PDF提取失敗: {metadata}")
+                    pdf_company = "未知公司"
+                    pdf_year = ""
+                else:
+                    pdf_company = metadata['company_name']
+                    pdf_year = metadata['report_year']
+                    print(f"   📄 PDF提取: 公司={pdf_company}, 年度={pdf_year}")
+            
             # 如果檔名匹配失敗，嘗試PDF提取的名稱
             if not stock_code and pdf_company != "未知公司":
-                pdf_clean = pdf_company.strip()
-                # 移除常見後綴
-                for suffix in ["股份有限公司", "有限公司", "公司", "工業", "化學", "塑膠"]:
-                    pdf_clean = pdf_clean.replace(suffix, "").strip()
+                # 移除常見後綴（單次掃描）
+                pdf_clean = _PDF_COMPANY_SUFFIX_RE.sub('', pdf_company).strip()
                 
-                for company_name, (code, std_name) in COMPLETE_COMPANY_MAPPING.items():
-                    if company_name in pdf_clean or pdf_clean in company_name:
-                        stock_code = code
-                        standard_name = std_name
-                        print(f"   ✅ PDF匹配: {stock_code} {standard_name}")
-                        break
+                # 取映射表順序中第一個互相包含的別名
+                matched_aliases = set(_find_aliases_in(pdf_clean)) | set(_find_aliases_containing(pdf_clean))
+                if matched_aliases:
+                    company_name = min(matched_aliases, key=_ALIAS_INDEX.rank.__getitem__)
+                    stock_code, standard_name = COMPLETE_COMPANY_MAPPING[company_name]
+                    print(f"   ✅ PDF匹配: {stock_code} {standard_name}")
             
             # 決定最終使用的年度
             final_year = filename_year or pdf_year
@@ -536,13 +856,13 @@ def standardize_pdf_filenames(data_path: str = None) -> Dict[str, str]:
                 if filename_candidates:
                     clean_name = filename_candidates[0]
                 elif pdf_company != "未知公司":
-                    clean_name = re.sub(r'[^\w\s-]', '', pdf_company)
-                    clean_name = re.sub(r'\s+', '', clean_name)
+                    clean_name = _NON_WORD_RE.sub('', pdf_company)
+                    clean_name = _WHITESPACE_RE.sub('', clean_name)
                 else:
                     # 從原檔名提取合理名稱
                     base_name = pdf_file.stem
-                    base_name = re.sub(r'_esg.*$', '', base_name, flags=re.IGNORECASE)
-                    base_name = re.sub(r'_202[0-9].*$', '', base_name)
+                    base_name = _ESG_TAIL_RE.sub('', base_name)
+                    base_name = _YEAR_TAIL_RE.sub('', base_name)
                     clean_name = base_name[:20]  # 限制長度
                 
                 if final_year:
@@ -598,119 +918,396 @@ def standardize_pdf_filenames(data_path: str = None) -> Dict[str, str]:
 # 原有的預處理功能
 # =============================================================================
 
-def preprocess_documents(pdf_path: str, output_db_path: str = None, metadata: Dict[str, str] = None):
-    """預處理PDF文檔並建立向量資料庫"""
+# 文本分割器（模組層級建立一次，所有PDF共用）
+_TEXT_SEPARATORS = ["\n\n", "\n", ".", "。", "，", " ", ""]
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=900,
+    chunk_overlap=180,
+    separators=_TEXT_SEPARATORS
+)
+
+_text_splitter = None
+
+def _get_text_splitter():
+    """
+    取得文本分割器（每個進程只建立一次）
     
-    if output_db_path is None:
-        output_db_path = VECTOR_DB_PATH
+    設定TOKEN_CHUNK_SIZE時改以embedding模型的tokenizer計算長度，
+    讓文本塊剛好符合模型的輸入上限，不會被截斷
+    """
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = TEXT_SPLITTER
+        if TOKEN_CHUNK_SIZE > 0:
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+                _text_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                    tokenizer,
+                    chunk_size=TOKEN_CHUNK_SIZE,
+                    chunk_overlap=TOKEN_CHUNK_OVERLAP,
+                    separators=_TEXT_SEPARATORS
+                )
+            except Exception as e:
+                print(f"⚠️ 無法載入tokenizer，改用字元數分割: {e}")
+    return _text_splitter
+
+def _resolve_embedding_device() -> str:
+    """解析embedding運算裝置，auto時有CUDA則使用GPU"""
+    if EMBEDDING_DEVICE != "auto":
+        return EMBEDDING_DEVICE
+    
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+def _resolve_embedding_precision(device: str) -> str:
+    """依裝置與設定決定embedding模型的運算精度：fp16（GPU）、int8（CPU量化）或fp32"""
+    if EMBEDDING_FP16 and device.startswith("cuda"):
+        return "fp16"
+    if EMBEDDING_INT8 and device == "cpu":
+        return "int8"
+    return "fp32"
+
+@lru_cache(maxsize=1)
+def create_embedding_model() -> HuggingFaceEmbeddings:
+    """
+    建立embedding模型（自動選擇裝置，批量編碼，GPU上使用半精度，CPU上可選int8量化）
     
-    print(f"開始處理PDF: {pdf_path}")
+    每個進程只載入一次：預處理與逐份報告的向量資料庫載入共用同一個模型
+    """
+    device = _resolve_embedding_device()
+    precision = _resolve_embedding_precision(device)
+    print(f"載入embedding模型: {EMBEDDING_MODEL} ({device}{'' if precision == 'fp32' else ', ' + precision})")
     
-    # 1. 載入PDF
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"找不到PDF文件: {pdf_path}")
+    embedding_model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={'device': device},
+        encode_kwargs={'batch_size': EMBEDDING_BATCH_SIZE}
+    )
     
-    loader = PyPDFLoader(pdf_path)
-    pages = loader.load()
-    print(f"成功載入 {len(pages)} 頁")
+    if precision == "fp16":
+        embedding_model.client.half()
+    elif precision == "int8":
+        # 將Linear層權重量化為int8，矩陣乘法改用int8運算
+        try:
+            import torch
+            torch.quantization.quantize_dynamic(
+                embedding_model.client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        except Exception as e:
+            print(f"⚠️ int8量化失敗，改用原始精度: {e}")
     
-    # 2. 為每個文檔添加元數據
+    return embedding_model
+
+# FAISS_INDEX_TYPE=auto時，文本塊達到此數量才改用IVF-PQ索引
+_AUTO_IVFPQ_MIN_VECTORS = 10000
+
+# embedding向量快取目錄（依文本內容雜湊存取，所有向量資料庫共用）
+EMBEDDING_CACHE_PATH = Path(VECTOR_DB_PATH).parent / "embedding_cache"
+
+def _embed_texts(texts: List[str], embedding_model) -> list:
+    """
+    計算文本塊的embedding
+    
+    啟用EMBEDDING_CACHE時只編碼快取中沒有的文本，相同內容的文本塊直接讀取已存的向量
+    """
+    if not EMBEDDING_CACHE:
+        return embedding_model.embed_documents(texts)
+    
+    try:
+        from langchain.embeddings import CacheBackedEmbeddings
+        from langchain.storage import LocalFileStore
+    except ImportError as e:
+        print(f"⚠️ 無法啟用embedding快取，改為直接編碼: {e}")
+        return embedding_model.embed_documents(texts)
+    
+    # 以模型名稱、裝置類型和運算精度區分命名空間，更換模型或精度後不會混用不同來源的向量
+    device = _resolve_embedding_device()
+    device_class = device.split(':')[0]
+    model_key = f"{EMBEDDING_MODEL}_{device_class}_{_resolve_embedding_precision(device)}"
+    namespace = re.sub(r'[^\w.\-]', '_', model_key)
+    cached_embedder = CacheBackedEmbeddings.from_bytes_store(
+        embedding_model, LocalFileStore(str(EMBEDDING_CACHE_PATH)), namespace=namespace
+    )
+    return cached_embedder.embed_documents(texts)
+
+def _create_faiss_index(embeddings: np.ndarray):
+    """
+    依FAISS_INDEX_TYPE建立並訓練FAISS索引
+    
+    文本塊數量不足以訓練量化器時自動退回flat索引
+    """
+    import faiss
+    
+    num_vectors, dimension = embeddings.shape
+    
+    index_type = FAISS_INDEX_TYPE
+    if index_type == "auto":
+        # 小型資料庫用flat精確搜索即可，大型資料庫才值得量化
+        index_type = "ivfpq" if num_vectors >= _AUTO_IVFPQ_MIN_VECTORS else "flat"
+    
+    if index_type == "ivfpq":
+        nlist = min(256, num_vectors // 39)
+        pq_m = 32 if dimension % 32 == 0 else 0
+        
+        # PQ每個子量化器有256個中心點，至少需要1024個向量才能有效訓練
+        if num_vectors >= 1024 and nlist >= 1 and pq_m:
+            index = faiss.index_factory(dimension, f"IVF{nlist},PQ{pq_m}x8")
+            index.train(embeddings)
+            index.nprobe = min(16, nlist)
+            index.add(embeddings)
+            print(f"   使用IVF{nlist},PQ{pq_m}索引")
+            return index
+        
+        print(f"   ⚠️ 文本塊數量不足（{num_vectors}），改用flat索引")
+    
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, 32)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        index.add(embeddings)
+        print("   使用HNSW32索引")
+        return index
+    
+    elif index_type == "sqfp16":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16)
+        index.train(embeddings)
+        index.add(embeddings)
+        print("   使用SQfp16索引")
+        return index
+    
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit)
+        index.train(embeddings)
+        index.add(embeddings)
+        print("   使用SQ8索引")
+        return index
+    
+    elif index_type == "hnswsq8":
+        # HNSW圖的節點向量以8位元儲存，兼顧查詢速度與記憶體
+        index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, 32)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        index.train(embeddings)
+        index.add(embeddings)
+        print("   使用HNSW32,SQ8索引")
+        return index
+    
+    index = faiss.IndexFlatL2(dimension)
+    index.add(embeddings)
+    return index
+
+def build_vector_store(chunks: list, embedding_model) -> FAISS:
+    """
+    計算所有文本塊的embedding並建立FAISS向量資料庫
+    
+    所有文本塊一次交給embed_documents，由模型依EMBEDDING_BATCH_SIZE分批編碼
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    
+    texts = [chunk.page_content for chunk in chunks]
+    embeddings = np.ascontiguousarray(_embed_texts(texts, embedding_model), dtype=np.float32)
+    
+    index = _create_faiss_index(embeddings)
+    docstore = InMemoryDocstore({str(i): chunk for i, chunk in enumerate(chunks)})
+    index_to_docstore_id = {i: str(i) for i in range(len(chunks))}
+    
+    return FAISS(embedding_model, index, docstore, index_to_docstore_id)
+
+def _load_pdf_pages(pdf_path: str) -> list:
+    """載入單個PDF的所有頁面（頂層函數，供進程池調用）"""
+    loader = _create_pdf_loader(pdf_path)
+    return loader.load()
+
+def _split_pages(pdf_path: str, pages: list, metadata: Dict[str, str] = None) -> list:
+    """為頁面添加元數據並分割成文本塊"""
+    # 為每個文檔添加元數據
     if metadata:
-        for page in pages:
+        source_file = Path(pdf_path).name
+        for page_number, page in enumerate(pages, start=1):
             page.metadata.update(metadata)
-            page.metadata['source_file'] = Path(pdf_path).name
+            page.metadata['source_file'] = source_file
             
             # 添加頁碼信息（如果缺失）
-            if 'page' not in page.metadata:
-                page.metadata['page'] = pages.index(page) + 1
-    
-    # 3. 文本分割
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=900,
-        chunk_overlap=180,
-        separators=["\n\n", "\n", ".", "。", "，", " ", ""]
-    )
+            page.metadata.setdefault('page', page_number)
     
+    # 文本分割
     print("正在分割文本...")
-    chunks = text_splitter.split_documents(pages)
+    chunks = _get_text_splitter().split_documents(pages)
     print(f"分割成 {len(chunks)} 個文本塊")
-    
-    # 4. 初始化embedding模型
-    print(f"載入embedding模型: {EMBEDDING_MODEL}")
-    embedding_model = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'}
-    )
-    
-    # 5. 建立向量資料庫
-    print("建立向量資料庫...")
-    db = FAISS.from_documents(chunks, embedding_model)
-    
-    # 6. 保存資料庫
+    return chunks
+
+def _write_vector_store(db: FAISS, output_db_path: str):
+    """將向量資料庫寫入output_db_path"""
     os.makedirs(os.path.dirname(output_db_path), exist_ok=True)
     db.save_local(output_db_path)
     print(f"向量資料庫已保存到: {output_db_path}")
-    
+
+def _save_vector_store(chunks: list, embedding_model, output_db_path: str) -> FAISS:
+    """建立向量資料庫並保存到output_db_path"""
+    print("建立向量資料庫...")
+    db = build_vector_store(chunks, embedding_model)
+    _write_vector_store(db, output_db_path)
     return db
 
-def preprocess_multiple_documents(pdf_paths: List[str]) -> Dict[str, Dict]:
+def preprocess_documents(pdf_path: str, output_db_path: str = None, metadata: Dict[str, str] = None,
+                         pages: list = None, embedding_model=None):
     """
-    批量預處理多個PDF文檔
+    預處理PDF文檔並建立向量資料庫
+    
+    Args:
+        pages: 已載入的PDF頁面（可選），提供時不再重新解析PDF
+        embedding_model: 已載入的embedding模型（可選），批量處理時共用同一個模型
+    """
+    
+    if output_db_path is None:
+        output_db_path = VECTOR_DB_PATH
+    
+    print(f"開始處理PDF: {pdf_path}")
+    
+    # 1. 載入PDF
+    if pages is None:
+        if not os.path.exists(pdf_path):
+            raise FileNotFoundError(f"找不到PDF文件: {pdf_path}")
+        
+        pages = _load_pdf_pages(pdf_path)
+    print(f"成功載入 {len(pages)} 頁")
+    
+    # 2. 添加元數據並分割文本
+    chunks = _split_pages(pdf_path, pages, metadata)
+    
+    # 3. 初始化embedding模型
+    if embedding_model is None:
+        embedding_model = create_embedding_model()
+    
+    # 4. 建立並保存向量資料庫
+    return _save_vector_store(chunks, embedding_model, output_db_path)
+
+# 向量資料庫的上層目錄（每個PDF的資料庫都建立在此目錄下）
+_VECTOR_DB_DIR = os.path.dirname(VECTOR_DB_PATH)
+
+def _prepare_one_pdf(pdf_path: str,
+                     refresh_cache: bool = False) -> Optional[Tuple[Dict[str, str], list, Dict[str, str]]]:
+    """
+    批量預處理階段1（可在工作進程執行）：載入PDF、提取元數據並分割文本
+    
+    Args:
+        refresh_cache: 忽略既有的元數據快取並重新提取
     
     Returns:
-        Dict: {pdf_path: {'db_path': str, 'metadata': dict}}
+        (metadata, chunks, 新增的快取條目)，失敗時返回None
     """
-    print(f"🚀 開始批量預處理 {len(pdf_paths)} 個PDF文件")
-    print("=" * 60)
+    pdf_file = Path(pdf_path)
     
-    metadata_extractor = DocumentMetadataExtractor()
+    try:
+        print(f"\n📄 處理文件: {pdf_file.name}")
+        
+        # 載入PDF（元數據提取和文本分割共用同一份頁面，只解析一次）
+        pages = _load_pdf_pages(pdf_path)
+        metadata = _get_metadata_extractor().extract_metadata(pdf_path, pages, refresh_cache)
+        chunks = _split_pages(pdf_path, pages, metadata)
+        
+        return metadata, chunks, _take_metadata_cache_updates()
+        
+    except Exception as e:
+        print(f"❌ 處理失敗 {pdf_file.name}: {e}")
+        return None
+
+def _embed_prepared_pdfs(pdf_paths: List[str], prepared, embedding_model) -> Dict[str, Dict]:
+    """批量預處理階段2（主進程）：依序為已分割的PDF建立向量資料庫"""
     results = {}
+    pending_writes = {}
+    cache_updates = {}
     
-    for pdf_path in pdf_paths:
-        try:
-            print(f"\n📄 處理文件: {Path(pdf_path).name}")
-            
-            # 1. 元數據提取
-            metadata = metadata_extractor.extract_metadata(pdf_path)
+    # 寫檔交給背景執行緒，與下一個PDF的embedding重疊進行
+    with ThreadPoolExecutor(max_workers=1) as write_pool:
+        for pdf_path, item in zip(pdf_paths, prepared):
+            if item is None:
+                continue
             
-            # 2. 為每個文件創建獨立的向量資料庫
-            pdf_name = Path(pdf_path).stem
-            db_path = os.path.join(
-                os.path.dirname(VECTOR_DB_PATH),
-                f"esg_db_{pdf_name}"
-            )
+            metadata, chunks, updates = item
+            cache_updates.update(updates)
+            pdf_file = Path(pdf_path)
+            pdf_name = pdf_file.stem
+            db_path = os.path.join(_VECTOR_DB_DIR, f"esg_db_{pdf_name}")
             
-            # 3. 預處理文檔
-            preprocess_documents(pdf_path, db_path, metadata)
+            try:
+                print("建立向量資料庫...")
+                db = build_vector_store(chunks, embedding_model)
+            except Exception as e:
+                print(f"❌ 處理失敗 {pdf_file.name}: {e}")
+                continue
             
+            # 上一個資料庫寫完才提交下一個，記憶體中最多保留兩個向量資料庫
+            if pending_writes:
+                wait([next(reversed(pending_writes.values()))])
+            pending_writes[pdf_path] = write_pool.submit(_write_vector_store, db, db_path)
             results[pdf_path] = {
                 'db_path': db_path,
                 'metadata': metadata,
                 'pdf_name': pdf_name
             }
-            
-            print(f"✅ 完成: {metadata['company_name']} - {metadata['report_year']}")
-            
+    
+    # 整批只寫一次元數據快取
+    _save_metadata_cache(cache_updates)
+    
+    # 確認所有向量資料庫都已寫入
+    for pdf_path, future in pending_writes.items():
+        try:
+            future.result()
         except Exception as e:
             print(f"❌ 處理失敗 {Path(pdf_path).name}: {e}")
+            del results[pdf_path]
             continue
+        
+        metadata = results[pdf_path]['metadata']
+        print(f"✅ 完成: {metadata['company_name']} - {metadata['report_year']}")
+    
+    return results
+
+def preprocess_multiple_documents(pdf_paths: List[str], refresh_cache: bool = False) -> Dict[str, Dict]:
+    """
+    批量預處理多個PDF文檔
+    
+    PDF解析和文本分割在工作進程並行執行；embedding在主進程以單一模型依序處理，
+    避免每個進程各載入一份模型（torch本身已會使用多核心或GPU）
+    
+    Args:
+        refresh_cache: 忽略既有的元數據快取並重新提取（強制重建時使用）
+    
+    Returns:
+        Dict: {pdf_path: {'db_path': str, 'metadata': dict}}
+    """
+    print(f"🚀 開始批量預處理 {len(pdf_paths)} 個PDF文件")
+    print("=" * 60)
+    
+    embedding_model = create_embedding_model()
+    max_workers = max(1, min(PREPROCESS_WORKERS, len(pdf_paths)))
+    
+    if max_workers == 1:
+        prepared = map(_prepare_one_pdf, pdf_paths, repeat(refresh_cache))
+        results = _embed_prepared_pdfs(pdf_paths, prepared, embedding_model)
+    else:
+        print(f"⚡ 使用 {max_workers} 個進程並行解析PDF...")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # map依序產出結果，主進程embedding時其餘PDF仍在背景解析
+            prepared = executor.map(_prepare_one_pdf, pdf_paths, repeat(refresh_cache), chunksize=1)
+            results = _embed_prepared_pdfs(pdf_paths, prepared, embedding_model)
     
     print(f"\n🎉 批量預處理完成！成功處理 {len(results)}/{len(pdf_paths)} 個文件")
     
     # 顯示提取結果摘要
     print(f"\n📋 提取摘要:")
     companies_years = {}
-    for pdf_path, result in results.items():
+    for result in results.values():
         metadata = result['metadata']
-        company = metadata['company_name']
-        year = metadata['report_year']
-        
-        if company not in companies_years:
-            companies_years[company] = []
-        companies_years[company].append(year)
+        companies_years.setdefault(metadata['company_name'], set()).add(metadata['report_year'])
     
     for company, years in companies_years.items():
-        years_str = ', '.join(sorted(set(years), reverse=True))
+        years_str = ', '.join(sorted(years, reverse=True))
         print(f"   🏢 {company}: {years_str}")
     
     return results
@@ -722,6 +1319,12 @@ def preprocess_multiple_documents(pdf_paths: List[str]) -> Dict[str, Dict]:
 def test_company_mapping():
     """測試公司映射表"""
     target_companies = ["信立", "勝昱", "世坤", "炎洲", "萬國通", "南亞", "台塑", "三芳"]
+    # 別名互相包含的檔名，應對應到較長的別名
+    overlapping_filenames = {
+        "國喬特_2023_esg報告書.pdf": ("1312A", "國喬特"),
+        "1312A_國喬特_2023.pdf": ("1312A", "國喬特"),
+        "國喬_2023_esg報告書.pdf": ("1312", "國喬"),
+    }
     
     print("🧪 測試公司映射表")
     print("=" * 40)
@@ -733,6 +1336,14 @@ def test_company_mapping():
         else:
             print(f"❌ {company} → 未找到映射")
     
+    print(f"\n🔍 別名重疊檔名:")
+    for filename, expected in overlapping_filenames.items():
+        # 與標準化相同：取第一個在映射表中的候選
+        candidates = smart_extract_company_from_filename(filename)
+        mapped = next((COMPLETE_COMPANY_MAPPING[c] for c in candidates if c in COMPLETE_COMPANY_MAPPING), None)
+        status = "✅" if mapped == expected else "❌"
+        print(f"{status} {filename} → {mapped} (預期 {expected})")
+    
     print(f"\n📊 映射表統計:")
     print(f"   總公司數: {len(COMPLETE_COMPANY_MAPPING)}")
     print(f"   13開頭塑膠工業: {len([k for k, v in COMPLETE_COMPANY_MAPPING.items() if v[0].startswith('13')])}")
@@ -758,8 +1369,7 @@ def diagnose_filename_issues(data_path: str = None):
         print(f"\n📄 診斷: {pdf_file.name}")
         
         # 檔名分析
-        candidates = smart_extract_company_from_filename(pdf_file.name)
-        year = extract_year_from_filename(pdf_file.name)
+        candidates, year = _scan_filename(pdf_file.name)
         
         print(f"   📝 檔名候選公司: {candidates}")
         print(f"   📅 檔名提取年度: {year}")